@@ -1,11 +1,18 @@
-from fastapi import FastAPI, HTTPException, Body
+from fastapi import FastAPI, HTTPException, Body, File, Form, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import FileResponse
 from pydantic import BaseModel
 from typing import List, Optional
 import uvicorn
 import datetime
+import collections
+import hashlib
 import os
+import re
+import json
+import shutil
+import threading
+import time
 
 # App and CORS
 app = FastAPI(title="Wrong-Side Driving API")
@@ -18,32 +25,52 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount evidence directory to serve images/videos
+# Evidence directory, served under /content (images/videos)
 # We assume the API runs from project root or we traverse up?
 # Let's find the output_evidence path relative to apps/api
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-EVIDENCE_DIR = os.path.join(BASE_DIR, "output_evidence")
+EVIDENCE_DIR = os.environ.get("EVIDENCE_DIR", os.path.join(BASE_DIR, "output_evidence"))
+# Partial uploads stay here until their hash is verified (same volume, so the final move is a rename).
+# It is never served: /content only returns plain, non-hidden files at the top level of EVIDENCE_DIR.
+UPLOAD_DIR = os.path.join(EVIDENCE_DIR, ".uploads")
 
-if not os.path.exists(EVIDENCE_DIR):
-    os.makedirs(EVIDENCE_DIR)
-
-app.mount("/content", StaticFiles(directory=EVIDENCE_DIR), name="evidence")
+for directory in (EVIDENCE_DIR, UPLOAD_DIR):
+    if not os.path.exists(directory):
+        os.makedirs(directory)
 
 # In-memory storage for MVP (Use DB in production)
 # We will use this simply to serve the frontend for the demo
 violations_db = []
 
+# Chunked evidence uploads, keyed by the file's SHA-256 so identical files are stored once
+upload_sessions = {} # sha256 -> {"filename", "size"}
+completed_uploads = {} # sha256 -> evidence_path (persisted in UPLOAD_INDEX_PATH)
+stored_hashes = {} # evidence_path -> sha256
+upload_locks = collections.defaultdict(threading.Lock)
+index_lock = threading.Lock()
+
+UPLOAD_INDEX_PATH = os.path.join(UPLOAD_DIR, "index.json")
+SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+MAX_CHUNK_SIZE = 8 * 1024 * 1024
+PART_EXPIRY_SECONDS = 24 * 60 * 60 # Partial uploads untouched this long are discarded
+
 class VehicleData(BaseModel):
     box: List[float]
     vector: List[float]
     centroid: List[float]
 
+class UploadRequest(BaseModel):
+    filename: str
+    size: int
+    sha256: str
+
 class ViolationEvent(BaseModel):
     event_id: str
     timestamp: float
     track_id: int
     vehicle_data: VehicleData
     evidence_path: str
+    snapshot_path: Optional[str] = None
     # metadata fields
     camera_id: Optional[str] = "CAM-01"
 
@@ -56,6 +83,208 @@ def create_violation(event: ViolationEvent):
     print(f"Received Violation: {event.event_id}")
     return {"status": "ok"}
 
+def _is_evidence_name(filename):
+    """
+    Plain, non-hidden file name with no directory part.
+    """
+    return (bool(filename) and not filename.startswith(".")
+            and "/" not in filename and "\\" not in filename)
+
+@app.get("/content/{filename}")
+def get_evidence(filename: str):
+    """
+    Serve a stored evidence file (clip or snapshot).
+    Upload state and any subdirectories are not exposed.
+    """
+    path = os.path.join(EVIDENCE_DIR, filename)
+    if not _is_evidence_name(filename) or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Not found")
+    return FileResponse(path)
+
+def _part_path(upload_id):
+    return os.path.join(UPLOAD_DIR, f"{upload_id}.part")
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _stored_hash(filename):
+    """
+    Hash of the evidence already stored under this name, or None.
+    """
+    path = os.path.join(EVIDENCE_DIR, filename)
+    if not os.path.exists(path):
+        return None
+    return stored_hashes.get(filename) or _file_sha256(path)
+
+def _release_lock_if_idle(upload_id):
+    """
+    Drop the lock of an upload that is finished, failed or expired.
+    """
+    if upload_id not in upload_sessions:
+        upload_locks.pop(upload_id, None)
+
+def _record_upload(upload_id, filename):
+    """
+    Add a stored file to the hash index and persist it.
+    """
+    with index_lock:
+        completed_uploads[upload_id] = filename
+        stored_hashes[filename] = upload_id
+        tmp_path = UPLOAD_INDEX_PATH + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(completed_uploads, f)
+        os.replace(tmp_path, UPLOAD_INDEX_PATH)
+
+def _load_upload_index():
+    """
+    Restore the hash index so files stored before a restart are not re-uploaded.
+    """
+    if not os.path.exists(UPLOAD_INDEX_PATH):
+        return
+    try:
+        with open(UPLOAD_INDEX_PATH) as f:
+            index = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring upload index: {e}")
+        return
+    for upload_id, filename in index.items():
+        if os.path.exists(os.path.join(EVIDENCE_DIR, filename)):
+            completed_uploads[upload_id] = filename
+            stored_hashes[filename] = upload_id
+
+def _expire_stale_parts():
+    """
+    Remove partial uploads that have not received data for PART_EXPIRY_SECONDS.
+    """
+    cutoff = time.time() - PART_EXPIRY_SECONDS
+    for name in os.listdir(UPLOAD_DIR):
+        if not name.endswith(".part"):
+            continue
+        part_path = os.path.join(UPLOAD_DIR, name)
+        try:
+            if os.path.getmtime(part_path) < cutoff:
+                os.remove(part_path)
+                upload_sessions.pop(name[:-len(".part")], None)
+                upload_locks.pop(name[:-len(".part")], None)
+        except OSError:
+            pass
+
+_load_upload_index()
+_expire_stale_parts()
+
+@app.post("/uploads")
+def create_upload(req: UploadRequest):
+    """
+    Start or resume a chunked evidence upload.
+    Returns the byte offset to continue from, or the stored evidence path
+    if a file with the same hash was already uploaded.
+    """
+    upload_id = req.sha256.lower()
+    filename = req.filename
+    if not SHA256_PATTERN.match(upload_id) or not _is_evidence_name(filename) or req.size <= 0:
+        raise HTTPException(status_code=400, detail="Invalid upload request")
+    # e.g. a name matching a subdirectory such as pending_uploads
+    path = os.path.join(EVIDENCE_DIR, filename)
+    if os.path.exists(path) and not os.path.isfile(path):
+        raise HTTPException(status_code=400, detail="Invalid upload request")
+
+    _expire_stale_parts()
+
+    try:
+        return _start_upload(upload_id, filename, req.size)
+    finally:
+        _release_lock_if_idle(upload_id)
+
+def _start_upload(upload_id, filename, size):
+    """
+    Body of create_upload, run while the caller cleans up the upload's lock.
+    """
+    if upload_id in completed_uploads:
+        return {"upload_id": upload_id, "offset": size, "complete": True,
+                "evidence_path": completed_uploads[upload_id]}
+
+    with upload_locks[upload_id]:
+        # Checked again under the lock: a retry can race the final chunk being hashed and renamed
+        if upload_id in completed_uploads:
+            return {"upload_id": upload_id, "offset": size, "complete": True,
+                    "evidence_path": completed_uploads[upload_id]}
+
+        # Never let different content replace stored evidence under the same name
+        stored_hash = _stored_hash(filename)
+        if stored_hash == upload_id:
+            _record_upload(upload_id, filename)
+            return {"upload_id": upload_id, "offset": size, "complete": True,
+                    "evidence_path": filename}
+        if stored_hash is not None:
+            raise HTTPException(status_code=422, detail="Evidence name already stored with different content")
+
+        part_path = _part_path(upload_id)
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        if offset > size:
+            os.remove(part_path)
+            offset = 0
+        upload_sessions[upload_id] = {"filename": filename, "size": size}
+
+    return {"upload_id": upload_id, "offset": offset, "complete": False}
+
+@app.put("/uploads/{upload_id}")
+def upload_chunk(upload_id: str, offset: int = Form(...), chunk: UploadFile = File(...)):
+    """
+    Append one chunk at the given offset. The offset must match the bytes
+    already received; on mismatch the client should re-sync via POST /uploads.
+    """
+    # Validate before touching upload_locks so unknown ids never create a lock
+    if not SHA256_PATTERN.match(upload_id) or upload_id not in upload_sessions:
+        raise HTTPException(status_code=404, detail="Unknown upload")
+
+    try:
+        with upload_locks[upload_id]:
+            session = upload_sessions.get(upload_id)
+            if session is None:
+                raise HTTPException(status_code=404, detail="Unknown upload")
+
+            part_path = _part_path(upload_id)
+            received = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            if offset != received:
+                raise HTTPException(status_code=409, detail={"offset": received})
+
+            # Stream the chunk to disk instead of reading it into memory
+            with open(part_path, "ab") as f:
+                shutil.copyfileobj(chunk.file, f, 1024 * 1024)
+            received = os.path.getsize(part_path)
+
+            if received - offset > MAX_CHUNK_SIZE or received > session["size"]:
+                with open(part_path, "r+b") as f:
+                    f.truncate(offset)
+                raise HTTPException(status_code=400, detail="Chunk too large")
+
+            if received < session["size"]:
+                return {"offset": received, "complete": False}
+
+            if _file_sha256(part_path) != upload_id:
+                os.remove(part_path)
+                del upload_sessions[upload_id]
+                raise HTTPException(status_code=422, detail="Content hash mismatch")
+
+            stored_hash = _stored_hash(session["filename"])
+            if stored_hash is not None and stored_hash != upload_id:
+                os.remove(part_path)
+                del upload_sessions[upload_id]
+                raise HTTPException(status_code=422, detail="Evidence name already stored with different content")
+
+            os.replace(part_path, os.path.join(EVIDENCE_DIR, session["filename"]))
+            _record_upload(upload_id, session["filename"])
+            del upload_sessions[upload_id]
+
+        print(f"Received Evidence: {session['filename']}")
+        return {"offset": received, "complete": True, "evidence_path": session["filename"]}
+    finally:
+        _release_lock_if_idle(upload_id)
+
 @app.get("/violations")
 def get_violations():
     """
@@ -68,7 +68,7 @@ function App() {
                             <div className="relative aspect-video bg-black group cursor-pointer">
                                 {/* For MVP we serve file directly, or use a placeholder if path not accessible by browser */}
                                 <img
-                                    src={`http://localhost:8000/content/${v.evidence_path.replace(/\\/g, '/').split('/').pop().replace('.mp4', '.jpg')}`}
+                                    src={`http://localhost:8000/content/${v.snapshot_path || v.evidence_path.replace(/\\/g, '/').split('/').pop().replace('.mp4', '.jpg')}`}
                                     className="w-full h-full object-cover opacity-80 group-hover:opacity-100 transition-opacity"
                                     onError={(e) => { e.target.src = 'https://placehold.co/600x400/1e293b/FFF?text=No+Image' }}
                                     alt="Violation"
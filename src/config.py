@@ -4,7 +4,9 @@ import os
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 INPUT_VIDEO_DIR = os.path.join(BASE_DIR, "input_videos")
 OUTPUT_EVIDENCE_DIR = os.path.join(BASE_DIR, "output_evidence")
+PENDING_UPLOADS_DIR = os.path.join(OUTPUT_EVIDENCE_DIR, "pending_uploads")
 MODELS_DIR = os.path.join(BASE_DIR, "models")
+DIRECTION_MAPS_DIR = os.path.join(BASE_DIR, "direction_maps")
 
 # Detection Settings
 MODEL_PATH = "yolov8n.pt"  # Using nano model for MVP speed
@@ -29,6 +31,26 @@ ROI_POINTS = [
 MAX_HISTORY_LENGTH = 30  # Frames to keep track history
 WRONG_WAY_ANGLE_THRESHOLD = 90.0 # Degrees
 VIOLATION_PERSISTENCE = 5 # Frames needed to confirm violation
+MIN_MOVEMENT_PX = 5.0 # Track vectors shorter than this are treated as stationary
+
+# Direction Field Settings
+# Coarse grid over the frame storing the dominant flow direction per cell.
+DIRECTION_GRID_SIZE = (18, 32)  # (rows, cols)
+DIRECTION_MIN_SAMPLES = 20  # Distinct tracks a cell needs before it is trusted
+DIRECTION_MIN_COHERENCE = 0.6  # 0..1, how consistently a cell's traffic agrees
+DIRECTION_DECAY = 0.98  # Per-track decay of a cell's history (~ last 50 tracks dominate)
+DIRECTION_SAVE_INTERVAL = 9000  # Frames between direction map saves (~5 min at 30fps)
+# Use the screen-half divider rule in cells the map has not learned yet.
+# Off: untrusted cells never confirm violations, so warm-up produces no false evidence.
+DIRECTION_DIVIDER_FALLBACK = False
+
+# Evidence Upload Settings
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # Bytes per chunk (API accepts up to 8 MB)
+UPLOAD_MAX_CONCURRENCY = 2  # Parallel evidence uploads
+UPLOAD_MAX_RETRIES = 5
+UPLOAD_TIMEOUT = 30  # Seconds per request
+UPLOAD_RETRY_DELAY = 60  # Seconds before an event that failed transiently is retried
 
 # Camera settings (can be overridden)
+CAMERA_ID = "CAM-01"
 DEFAULT_CAMERA_SOURCE = os.path.join(INPUT_VIDEO_DIR, "sample.mp4")
@@ -1,16 +1,22 @@
 import cv2
 import sys
+import signal
 import argparse
 from ingestion.video_loader import VideoLoader
 from detection.vehicle_detector import VehicleDetector
 from lanes.classical_lanes import ClassicalLaneDetector
 from violation.logic import ViolationLogic
+from violation.direction_field import DirectionField
 from ui.visualizer import Visualizer
-from config import DEFAULT_CAMERA_SOURCE
+from config import DEFAULT_CAMERA_SOURCE, CAMERA_ID, DIRECTION_SAVE_INTERVAL
 
 def main():
     parser = argparse.ArgumentParser(description="Wrong Side Driving Detection")
     parser.add_argument("--source", type=str, default=None, help="Path to video file or RTSP stream")
+    parser.add_argument("--camera-id", type=str, default=CAMERA_ID, help="Camera ID, selects the persisted direction map")
+    parser.add_argument("--freeze-direction-map", action="store_true", help="Use the stored direction map without learning from this run")
+    parser.add_argument("--reset-direction-map", action="store_true", help="Ignore the stored direction map and rebuild it from this run")
+    parser.add_argument("--divider-fallback", action="store_true", help="Use the screen-half divider rule in cells the direction map has not learned yet")
     args = parser.parse_args()
 
     source = args.source if args.source else DEFAULT_CAMERA_SOURCE
@@ -25,72 +31,93 @@ def main():
 
     detector = VehicleDetector()
     lane_detector = ClassicalLaneDetector(loader.width, loader.height)
-    logic = ViolationLogic()
+
+    # Expected-direction map for this camera, learned from accumulated track vectors
+    direction_field = DirectionField(loader.width, loader.height)
+    direction_map_path = DirectionField.path_for(args.camera_id)
+    if args.reset_direction_map:
+        print(f"Rebuilding direction map: {direction_map_path}")
+    elif direction_field.load(direction_map_path):
+        print(f"Loaded direction map: {direction_map_path}")
+    learn_directions = not args.freeze_direction_map
+    logic = ViolationLogic(direction_field, learn_directions=learn_directions,
+                           divider_fallback=args.divider_fallback or None)
     visualizer = Visualizer()
     
     from violation.evidence import EvidenceCollector
-    evidence_collector = EvidenceCollector()
+    evidence_collector = EvidenceCollector(camera_id=args.camera_id)
     
     print("Starting Main Loop... Press 'q' to quit.")
     
-    for frame in loader:
-        # Update Evidence Buffer
-        evidence_collector.update_buffer(frame)
+    # docker stop / kill send SIGTERM; exit normally so the finally block still runs
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    try:
+        for frame_index, frame in enumerate(loader, 1):
+            # Update Evidence Buffer
+            evidence_collector.update_buffer(frame)
         
-        # 1. Detection & Tracking
-        detections = detector.detect(frame)
-        tracked_detections = detector.track(detections)
+            # 1. Detection & Tracking
+            detections = detector.detect(frame)
+            tracked_detections = detector.track(detections)
         
-        # 2. Lane Detection (Visual only for now in MVP)
-        lane_mask = lane_detector.detect_lines(frame) # Just get the lines
+            # 2. Lane Detection (Visual only for now in MVP)
+            lane_mask = lane_detector.detect_lines(frame) # Just get the lines
         
-        # 3. Violation Logic
-        # Update tracks and calculate vectors
-        movement_data = logic.update_tracks(tracked_detections)
+            # 3. Violation Logic
+            # Update tracks and calculate vectors
+            movement_data = logic.update_tracks(tracked_detections)
         
-        violations = []
-        active_violation_ids = set()
+            violations = logic.check_violations(movement_data, loader.width)
+            active_violation_ids = set()
         
-        for data in movement_data:
-            if logic.check_violation(data, loader.width):
-                violations.append(data)
+            for data in violations:
                 track_id = data['track_id']
                 active_violation_ids.add(track_id)
                 # Log evidence
                 evidence_collector.log_violation_start(track_id, data)
                 evidence_collector.log_violation_frame(track_id, frame)
         
-        # Check for ended violations (vehicles leaving frame or correcting course)
-        # We need to know which IDs were active previously but not now?
-        # Simplified: Check evidence_collector's active list
-        for tid in list(evidence_collector.active_violations.keys()):
-            # If track_id not in current frame detections OR not in current violations list?
-            # Let's say if it's no longer violating, we save and close.
-            if tid not in active_violation_ids:
-                 evidence_collector.log_violation_end(tid)
+            # Check for ended violations (vehicles leaving frame or correcting course)
+            # We need to know which IDs were active previously but not now?
+            # Simplified: Check evidence_collector's active list
+            for tid in list(evidence_collector.active_violations.keys()):
+                # If track_id not in current frame detections OR not in current violations list?
+                # Let's say if it's no longer violating, we save and close.
+                if tid not in active_violation_ids:
+                     evidence_collector.log_violation_end(tid)
 
-        # 4. Visualization
-        # Draw lanes
-        frame = visualizer.draw_lanes(frame, lane_mask, lane_detector.src_points)
+            # 4. Visualization
+            # Draw lanes
+            frame = visualizer.draw_lanes(frame, lane_mask, lane_detector.src_points)
         
-        # Draw tracks
-        frame = visualizer.draw_detections(frame, tracked_detections)
+            # Draw tracks
+            frame = visualizer.draw_detections(frame, tracked_detections)
         
-        # Draw violations
-        frame = visualizer.draw_violations(frame, violations)
+            # Draw violations
+            frame = visualizer.draw_violations(frame, violations)
         
-        # Display
-        cv2.imshow("Wrong Side Driving Detection", frame)
+            # Display
+            cv2.imshow("Wrong Side Driving Detection", frame)
         
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
+            # Persist the learned map periodically so a killed process loses little
+            if learn_directions and frame_index % DIRECTION_SAVE_INTERVAL == 0:
+                direction_field.save(direction_map_path)
+
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
 
-    # Cleanup any remaining violations
-    for tid in list(evidence_collector.active_violations.keys()):
-        evidence_collector.log_violation_end(tid)
+        # Cleanup any remaining violations
+        for tid in list(evidence_collector.active_violations.keys()):
+            evidence_collector.log_violation_end(tid)
+        evidence_collector.close()
+    finally:
+        if learn_directions:
+            direction_field.save(direction_map_path)
+            print(f"Saved direction map: {direction_map_path}")
 
-    loader.release()
-    cv2.destroyAllWindows()
+        loader.release()
+        cv2.destroyAllWindows()
 
 if __name__ == "__main__":
     main()
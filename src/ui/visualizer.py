@@ -2,46 +2,70 @@ import cv2
 import supervision as sv
 import numpy as np
 
+ROI_COLOR = (0, 255, 255)
+LANE_TINT = (0, 0, 128, 0) # Half-strength red added where the lane mask is set
+
 class Visualizer:
     def __init__(self):
         self.box_annotator = sv.BoxAnnotator()
         self.label_annotator = sv.LabelAnnotator()
         self.trace_annotator = sv.TraceAnnotator()
 
+        # ROI outline points and padded bounding box, rebuilt only if frame size or ROI changes
+        self._roi_key = None
+        self._roi_pts = None
+        self._roi_bbox = None
+
+    def _cache_roi(self, frame_shape, src_points):
+        """
+        Compute the ROI outline points and the bounding box lane tinting is limited to.
+        """
+        h, w = frame_shape[:2]
+        pts = src_points.reshape((-1, 1, 2)).astype(np.int32)
+
+        # Pad by the line thickness so the outline is covered
+        bx, by, bw, bh = cv2.boundingRect(pts)
+        x1, y1 = max(bx - 2, 0), max(by - 2, 0)
+        x2, y2 = min(bx + bw + 2, w), min(by + bh + 2, h)
+
+        self._roi_pts = pts
+        self._roi_bbox = (x1, y1, x2, y2)
+
     def draw_detections(self, frame, detections):
         """
         Draw bounding boxes and labels using supervision.
         detections: sv.Detections
         """
-        # Create labels: "ClassID Conf" or "TrackID" if available
-        labels = []
-        for i in range(len(detections)):
-            track_id = detections.tracker_id[i] if detections.tracker_id is not None else "N/A"
-            class_id = detections.class_id[i]
-            labels.append(f"#{track_id}")
+        if len(detections) == 0:
+            return frame
 
         frame = self.box_annotator.annotate(scene=frame, detections=detections)
-        frame = self.label_annotator.annotate(scene=frame, detections=detections, labels=labels)
-        frame = self.trace_annotator.annotate(scene=frame, detections=detections)
+
+        # Labels are only meaningful with track IDs ("#TrackID")
+        if detections.tracker_id is not None:
+            labels = np.char.add("#", detections.tracker_id.astype(str)).tolist()
+            frame = self.label_annotator.annotate(scene=frame, detections=detections, labels=labels)
+            frame = self.trace_annotator.annotate(scene=frame, detections=detections)
         return frame
 
     def draw_lanes(self, frame, lane_mask, src_points):
         """
-        Draw the lane overlay.
+        Draw the lane overlay and ROI polygon, in place.
+        Only the ROI bounding box is touched.
         """
-        # Overlay the mask with transparency
-        # lane_mask is single channel, make it BGR (Red for lanes)
-        colored_mask = cv2.cvtColor(lane_mask, cv2.COLOR_GRAY2BGR)
-        colored_mask[:, :, 0] = 0 # Zero Blue
-        colored_mask[:, :, 1] = 0 # Zero Green
-        # Red channel is the mask value
-        
-        frame = cv2.addWeighted(frame, 1, colored_mask, 0.5, 0)
-        
+        key = (frame.shape, src_points.tobytes())
+        if key != self._roi_key:
+            self._cache_roi(frame.shape, src_points)
+            self._roi_key = key
+
+        # Tint lane pixels red in place (lane_mask is binary 0/255 from inRange)
+        x1, y1, x2, y2 = self._roi_bbox
+        roi = frame[y1:y2, x1:x2]
+        cv2.add(roi, LANE_TINT, dst=roi, mask=lane_mask[y1:y2, x1:x2])
+
         # Draw ROI polygon
-        pts = src_points.reshape((-1, 1, 2)).astype(np.int32)
-        cv2.polylines(frame, [pts], True, (0, 255, 255), 2)
-        
+        cv2.polylines(frame, [self._roi_pts], True, ROI_COLOR, 2)
+
         return frame
 
     def draw_violations(self, frame, violations):
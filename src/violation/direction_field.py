@@ -0,0 +1,143 @@
+import os
+import zipfile
+import numpy as np
+from config import (
+    DIRECTION_MAPS_DIR,
+    DIRECTION_GRID_SIZE,
+    DIRECTION_MIN_SAMPLES,
+    DIRECTION_MIN_COHERENCE,
+    DIRECTION_DECAY,
+    MIN_MOVEMENT_PX,
+)
+
+class DirectionField:
+    """
+    Coarse grid over the frame holding the dominant flow direction per cell.
+
+    Each cell keeps an exponentially decayed sum of the unit movement vectors
+    seen inside it, so recent traffic outweighs old samples and a cell that
+    learned the wrong direction is corrected by the traffic that follows.
+    The mean of those unit vectors gives the expected direction, and its
+    length (0..1) tells how consistently traffic in that cell agrees.
+    The grid is in normalized frame coordinates, so a map learned at one
+    resolution can be reused at another for the same camera.
+    """
+    def __init__(self, frame_width, frame_height, grid_size=DIRECTION_GRID_SIZE):
+        # Decayed counts converge to 1 / (1 - decay); a higher threshold is never reached
+        if DIRECTION_DECAY < 1 and DIRECTION_MIN_SAMPLES >= 1 / (1 - DIRECTION_DECAY):
+            raise ValueError(
+                f"DIRECTION_MIN_SAMPLES ({DIRECTION_MIN_SAMPLES}) must be below "
+                f"1 / (1 - DIRECTION_DECAY) ({1 / (1 - DIRECTION_DECAY):.1f}) or no cell can be trusted"
+            )
+
+        self.width = frame_width
+        self.height = frame_height
+        self.rows, self.cols = grid_size
+
+        self.vector_sums = np.zeros((self.rows, self.cols, 2), dtype=np.float32)
+        self.counts = np.zeros((self.rows, self.cols), dtype=np.float32) # Decayed distinct tracks per cell
+        self._track_cells = {} # track_id -> flat index of the last cell it contributed to
+
+    @staticmethod
+    def path_for(camera_id):
+        return os.path.join(DIRECTION_MAPS_DIR, f"{camera_id}.npz")
+
+    def cell_indices(self, centroids):
+        """
+        Map an (N, 2) array of pixel centroids to (row, col) index arrays.
+        """
+        centroids = np.asarray(centroids, dtype=np.float32).reshape(-1, 2)
+        cols = (centroids[:, 0] * (self.cols / self.width)).astype(np.int32)
+        rows = (centroids[:, 1] * (self.rows / self.height)).astype(np.int32)
+        return np.clip(rows, 0, self.rows - 1), np.clip(cols, 0, self.cols - 1)
+
+    def accumulate(self, track_ids, centroids, vectors):
+        """
+        Add a batch of track vectors to the field.
+        Each track counts once per cell: it contributes when it first moves
+        inside a cell, not on every frame it spends there.
+        Near-stationary vectors carry no direction and are skipped.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, 2)
+        norms = np.linalg.norm(vectors, axis=1)
+        rows, cols = self.cell_indices(centroids)
+        cells = rows * self.cols + cols
+
+        # Only remember tracks that are still active
+        track_cells = {}
+        new_cell = np.zeros(len(vectors), dtype=bool)
+        for i, track_id in enumerate(track_ids):
+            last_cell = self._track_cells.get(track_id)
+            if norms[i] >= MIN_MOVEMENT_PX and last_cell != cells[i]:
+                new_cell[i] = True
+                track_cells[track_id] = cells[i]
+            elif last_cell is not None:
+                track_cells[track_id] = last_cell
+        self._track_cells = track_cells
+
+        if not np.any(new_cell):
+            return
+
+        # Decay the touched cells once, then add the new samples
+        touched = np.unique(cells[new_cell])
+        touched_rows, touched_cols = touched // self.cols, touched % self.cols
+        self.vector_sums[touched_rows, touched_cols] *= DIRECTION_DECAY
+        self.counts[touched_rows, touched_cols] *= DIRECTION_DECAY
+
+        units = vectors[new_cell] / norms[new_cell, None]
+        np.add.at(self.vector_sums, (rows[new_cell], cols[new_cell]), units)
+        np.add.at(self.counts, (rows[new_cell], cols[new_cell]), 1)
+
+    def expected_directions(self, centroids):
+        """
+        Look up the expected unit direction for each centroid.
+
+        Returns (directions, valid): directions is (N, 2); valid is a boolean
+        mask of cells seen by enough tracks, agreeing enough, to be trusted.
+        """
+        rows, cols = self.cell_indices(centroids)
+        sums = self.vector_sums[rows, cols]
+        counts = self.counts[rows, cols]
+
+        mean = sums / np.maximum(counts, 1)[:, None]
+        coherence = np.linalg.norm(mean, axis=1)
+        valid = (counts >= DIRECTION_MIN_SAMPLES) & (coherence >= DIRECTION_MIN_COHERENCE)
+
+        directions = mean / np.maximum(coherence, 1e-6)[:, None]
+        return directions, valid
+
+    def save(self, path):
+        """
+        Write the map atomically, so an interrupted save keeps the previous file.
+        """
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(f, vector_sums=self.vector_sums, counts=self.counts)
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        """
+        Load a persisted map. Returns False if missing, unreadable or the grid size differs.
+        """
+        if not os.path.exists(path):
+            return False
+
+        try:
+            with np.load(path) as data:
+                vector_sums = data["vector_sums"]
+                counts = data["counts"]
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+            print(f"[DirectionField] Ignoring unreadable {path}: {e}")
+            return False
+
+        if counts.shape != (self.rows, self.cols) or vector_sums.shape != (self.rows, self.cols, 2):
+            print(f"[DirectionField] Ignoring {path}: grid {counts.shape} != {(self.rows, self.cols)}")
+            return False
+
+        self.vector_sums = vector_sums.astype(np.float32)
+        self.counts = counts.astype(np.float32)
+        return True
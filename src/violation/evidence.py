@@ -1,24 +1,41 @@
 import cv2
 import json
 import os
+import threading
 import time
 import uuid
 import requests
 import numpy as np
 from collections import deque
-from config import OUTPUT_EVIDENCE_DIR
+from config import (
+    OUTPUT_EVIDENCE_DIR,
+    PENDING_UPLOADS_DIR,
+    CAMERA_ID,
+    UPLOAD_TIMEOUT,
+    UPLOAD_RETRY_DELAY,
+)
+from violation.uploader import EvidenceUploader
 
 # API Configuration
-API_URL = "http://localhost:8000/violation"
+API_BASE_URL = "http://localhost:8000"
+API_URL = f"{API_BASE_URL}/violation"
 
 class EvidenceCollector:
-    def __init__(self, buffer_size=300): # 300 frames @ 30fps = 10 seconds history
+    def __init__(self, buffer_size=300, camera_id=CAMERA_ID): # 300 frames @ 30fps = 10 seconds history
         self.buffer_size = buffer_size
+        self.camera_id = camera_id
         self.frame_buffer = deque(maxlen=buffer_size)
         self.active_violations = {} # track_id -> {start_time, frames}
+        self.uploader = EvidenceUploader(API_BASE_URL)
+        self.retry_timers = {} # pending_path -> Timer re-submitting a transient failure
+        self.retry_lock = threading.Lock()
+        self.closed = False
         
-        if not os.path.exists(OUTPUT_EVIDENCE_DIR):
-            os.makedirs(OUTPUT_EVIDENCE_DIR)
+        for directory in (OUTPUT_EVIDENCE_DIR, PENDING_UPLOADS_DIR):
+            if not os.path.exists(directory):
+                os.makedirs(directory)
+
+        self.resume_pending_uploads()
 
     def update_buffer(self, frame):
         """
@@ -55,6 +72,57 @@ class EvidenceCollector:
             self.save_evidence(track_id)
             del self.active_violations[track_id]
 
+    def resume_pending_uploads(self):
+        """
+        Re-queue uploads left unfinished by a previous run.
+        """
+        for name in sorted(os.listdir(PENDING_UPLOADS_DIR)):
+            if name.endswith(".json"):
+                print(f"[EvidenceCollector] Resuming upload: {name}")
+                self.uploader.submit(self.sync_with_api, os.path.join(PENDING_UPLOADS_DIR, name))
+
+    def close(self):
+        """
+        Wait for background uploads to finish.
+        Scheduled retries are dropped; their records are resumed on the next run.
+        """
+        with self.retry_lock:
+            self.closed = True
+            for timer in self.retry_timers.values():
+                timer.cancel()
+            self.retry_timers.clear()
+        self.uploader.shutdown()
+
+    def retry_later(self, pending_path):
+        """
+        Re-submit a pending upload after UPLOAD_RETRY_DELAY seconds.
+        """
+        def resubmit():
+            with self.retry_lock:
+                if self.closed:
+                    return
+                self.retry_timers.pop(pending_path, None)
+                self.uploader.submit(self.sync_with_api, pending_path)
+
+        with self.retry_lock:
+            if self.closed:
+                return
+            timer = threading.Timer(UPLOAD_RETRY_DELAY, resubmit)
+            timer.daemon = True
+            self.retry_timers[pending_path] = timer
+            timer.start()
+        print(f"[EvidenceCollector] Will retry {os.path.basename(pending_path)} in {UPLOAD_RETRY_DELAY}s")
+
+    def quarantine(self, pending_path, reason):
+        """
+        Set aside a pending upload that cannot succeed, so it is not resumed again.
+        """
+        print(f"[EvidenceCollector] Giving up on {os.path.basename(pending_path)}: {reason}")
+        try:
+            os.replace(pending_path, pending_path + ".failed")
+        except OSError as e:
+            print(f"[EvidenceCollector] Could not set aside {pending_path}: {e}")
+
     def save_evidence(self, track_id):
         """
         Compile the clip (History + Event) and save to disk.
@@ -122,23 +190,52 @@ class EvidenceCollector:
             
         print(f"[EvidenceCollector] Evidence Saved: {video_path}")
         
-        # 5. Send to API (Fire and Forget)
+        # 5. Send to API in the background (Fire and Forget)
+        # The pending record survives restarts until the API has the event
+        meta["camera_id"] = self.camera_id
+        pending_path = os.path.join(PENDING_UPLOADS_DIR, f"{event_id}.json")
+        with open(pending_path, 'w') as f:
+            json.dump({"meta": meta, "video_path": video_path, "img_path": img_path}, f)
+        self.uploader.submit(self.sync_with_api, pending_path)
+
+    def sync_with_api(self, pending_path):
+        """
+        Upload the clip and snapshot, then post the event with the stored evidence path.
+        Runs on an uploader worker thread. The pending record is removed on success,
+        retried later on transient failures and set aside as .failed otherwise.
+        """
         try:
-            # We need to make sure data types are JSON serializable (already done in meta)
-            # Add camera_id
-            meta["camera_id"] = "CAM-01"
-            
+            with open(pending_path) as f:
+                pending = json.load(f)
+            meta = pending["meta"]
+
+            video_path = pending["video_path"]
+            if not os.path.isfile(video_path) or os.path.getsize(video_path) == 0:
+                self.quarantine(pending_path, f"clip missing or empty: {video_path}")
+                return
+
+            meta["evidence_path"] = self.uploader.upload_file(video_path)
+            if os.path.exists(pending["img_path"]):
+                # Stored name may differ from the local one when the API dedups content
+                meta["snapshot_path"] = self.uploader.upload_file(pending["img_path"])
+
             # The API expects specific schema. 
             # Our meta keys match ViolationEvent model:
-            # - event_id, timestamp, track_id, vehicle_data, evidence_path
-            
-            # We might want to serve the evidence file via a static server or upload it.
-            # For MVP, we send the absolute path (works since API is on same machine)
-            
-            response = requests.post(API_URL, json=meta)
+            # - event_id, timestamp, track_id, vehicle_data, evidence_path, snapshot_path
+            response = requests.post(API_URL, json=meta, timeout=UPLOAD_TIMEOUT)
             if response.status_code == 200:
+                os.remove(pending_path)
                 print(f"[EvidenceCollector] Synced with API.")
-            else:
+            elif response.status_code >= 500:
                 print(f"[EvidenceCollector] API Error: {response.text}")
+                self.retry_later(pending_path)
+            else:
+                self.quarantine(pending_path, f"API Error: {response.text}")
+        except requests.RequestException as e:
+            if self.uploader.is_transient(e):
+                print(f"[EvidenceCollector] Failed to sync with API: {e}")
+                self.retry_later(pending_path)
+            else:
+                self.quarantine(pending_path, e)
         except Exception as e:
-            print(f"[EvidenceCollector] Failed to sync with API: {e}")
+            self.quarantine(pending_path, e)
@@ -2,10 +2,22 @@ import numpy as np
 import collections
 
 class ViolationLogic:
-    def __init__(self):
+    def __init__(self, direction_field=None, learn_directions=True, divider_fallback=None):
+        from config import WRONG_WAY_ANGLE_THRESHOLD, DIRECTION_DIVIDER_FALLBACK
+
         # Map track_id -> deque of recent positions (centroids)
         self.track_history = collections.defaultdict(lambda: collections.deque(maxlen=30))
         self.confirmed_violations = set() # Set of track_ids currently violating
+        self.violation_counters = collections.defaultdict(int) # track_id -> consecutive bad frames
+
+        # Learned expected-direction map (see violation.direction_field)
+        self.direction_field = direction_field
+        self.learn_directions = learn_directions
+        # Whether cells the field has not learned yet use the screen-half divider rule.
+        # Off by default: during warm-up, untrusted cells never confirm a violation.
+        self.divider_fallback = DIRECTION_DIVIDER_FALLBACK if divider_fallback is None else divider_fallback
+        # Moving more than WRONG_WAY_ANGLE_THRESHOLD away from the flow is a violation
+        self.cos_threshold = np.cos(np.radians(WRONG_WAY_ANGLE_THRESHOLD))
 
     def update_tracks(self, detections):
         """
@@ -48,71 +60,58 @@ class ViolationLogic:
         
         return violations
         
-    def check_violation(self, vehicle_data, frame_width):
+    def check_violations(self, movement_data, frame_width):
         """
-        Enhanced Logic: 
-        1. Check geometry (Left vs Right lane).
+        Check every active track at once.
+        1. Geometry: dot product of each track's unit vector with the expected
+           direction of its cell in the direction field. Cells the field has not
+           learned yet are skipped (learning mode), or use the screen-half
+           divider rule if divider_fallback is set. Without a field, the
+           divider rule is used everywhere.
         2. Require persistence (VIOLATION_PERSISTENCE frames).
+        Returns the movement entries with a confirmed violation.
         """
-        from config import VIOLATION_PERSISTENCE
-        
-        vid_w = frame_width
-        centroid_x = vehicle_data["centroid"][0]
-        dx, dy = vehicle_data["vector"]
-        track_id = vehicle_data["track_id"]
-        
-        # DEBUG: Print vector to see what's happening
-        # print(f"ID {track_id}: Centroid={centroid_x:.1f}, Vector=({dx:.2f}, {dy:.2f})")
-        
-        is_violation_instant = False
-        
-        # Simple Logic: Divider at 50% width
-        if centroid_x < vid_w / 2:
-            # LEFT LANE -> Expected DOWN (dy > 0). Violation if Moving UP (dy < -5)
-            # NOTE: In computer vision (0,0) is Top-Left. 
-            # Down = y increases (dy > 0). Up = y decreases (dy < 0).
-            # If camera is looking AT oncoming traffic:
-            # They move Down (dy > 0). 
-            # Wrong way would be moving UP (dy < 0) - i.e. away from camera? 
-            # It depends on the camera angle.
-            
-            # Let's log potential issues
-            if dy < -5: 
-                print(f"[DEBUG] Potential Violation Left: ID {track_id} dy={dy:.2f}")
-                is_violation_instant = True
-        else:
-            # RIGHT LANE -> Expected UP (dy < 0). Violation if Moving DOWN (dy > 5)
-            if dy > 5:
-                print(f"[DEBUG] Potential Violation Right: ID {track_id} dy={dy:.2f}")
-                is_violation_instant = True
-                
+        from config import VIOLATION_PERSISTENCE, MIN_MOVEMENT_PX
+
+        if not movement_data:
+            return []
+
+        centroids = np.array([d["centroid"] for d in movement_data], dtype=np.float32)
+        vectors = np.array([d["vector"] for d in movement_data], dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1)
+        moving = norms >= MIN_MOVEMENT_PX
+
+        # Fallback: Divider at 50% width
+        # LEFT LANE -> Expected DOWN (dy > 0). RIGHT LANE -> Expected UP (dy < 0).
+        # NOTE: In computer vision (0,0) is Top-Left, so Down = y increases.
+        dy = vectors[:, 1]
+        is_violation_instant = np.where(
+            centroids[:, 0] < frame_width / 2, dy < -MIN_MOVEMENT_PX, dy > MIN_MOVEMENT_PX
+        )
+
+        if self.direction_field is not None:
+            expected, valid = self.direction_field.expected_directions(centroids)
+            units = vectors / np.maximum(norms, 1e-6)[:, None]
+            against_flow = moving & (np.sum(units * expected, axis=1) < self.cos_threshold)
+            untrusted = is_violation_instant if self.divider_fallback else False
+            is_violation_instant = np.where(valid, against_flow, untrusted)
+
+            if self.learn_directions:
+                # Learn from every track, violators included. Wrong-way drivers are rare
+                # and each counts once per cell, so the decayed majority still wins.
+                track_ids = [d["track_id"] for d in movement_data]
+                self.direction_field.accumulate(track_ids, centroids, vectors)
+
         # Persistence Check
-        if is_violation_instant:
-            # Increment potential violation counter?
-            # Or simplified: We check if this track_id has been 'bad' for N frames.
-            # We can use the history we already have.
-            
-            # Let's count how many recent frames were "wrong way"
-            # Optimization: Just return True if we have > N consecutive bad movements
-            pass # Logic happens in main loop or we store state here?
-            
-            # Let's verify using the history vector logic we already computed for the *current* frame.
-            # Ideally we check the last N vectors.
-            
-            # For this MVP refactoring, let's use a simpler counter in self.confirmed_violations
-            # But wait, self.confirmed_violations is a set.
-            
-            # Let's rename/use a counter dict
-            if not hasattr(self, 'violation_counters'):
-                self.violation_counters = collections.defaultdict(int)
-                
-            self.violation_counters[track_id] += 1
-            
-            if self.violation_counters[track_id] >= VIOLATION_PERSISTENCE:
-                return True
-        else:
-            # Reset counter if vehicle corrects itself or is noise
-            if hasattr(self, 'violation_counters'):
+        confirmed = []
+        for data, is_bad in zip(movement_data, is_violation_instant):
+            track_id = data["track_id"]
+            if is_bad:
+                self.violation_counters[track_id] += 1
+                if self.violation_counters[track_id] >= VIOLATION_PERSISTENCE:
+                    confirmed.append(data)
+            else:
+                # Reset counter if vehicle corrects itself or is noise
                 self.violation_counters[track_id] = 0
-                
-        return False
+
+        return confirmed
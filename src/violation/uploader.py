@@ -0,0 +1,105 @@
+import hashlib
+import os
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from config import UPLOAD_CHUNK_SIZE, UPLOAD_MAX_CONCURRENCY, UPLOAD_MAX_RETRIES, UPLOAD_TIMEOUT
+
+class EvidenceUploader:
+    """
+    Streams evidence files to the API in fixed-size chunks.
+    Only one chunk per worker is held in memory, interrupted uploads resume
+    from the offset the API reports, and files the API already has are skipped.
+    """
+    def __init__(self, base_url, chunk_size=UPLOAD_CHUNK_SIZE,
+                 max_concurrency=UPLOAD_MAX_CONCURRENCY, max_retries=UPLOAD_MAX_RETRIES):
+        self.base_url = base_url.rstrip("/")
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency)
+
+    def submit(self, fn, *args):
+        """
+        Run an upload job in the background worker pool.
+        """
+        return self.executor.submit(fn, *args)
+
+    def shutdown(self):
+        """
+        Wait for pending uploads to finish.
+        """
+        self.executor.shutdown(wait=True)
+
+    def file_sha256(self, path):
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(self.chunk_size), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def upload_file(self, path):
+        """
+        Upload a file, retrying with backoff. Returns the evidence path stored by the API.
+        """
+        size = os.path.getsize(path)
+        sha256 = self.file_sha256(path)
+        filename = os.path.basename(path)
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self._upload_from_offset(path, filename, size, sha256)
+            except requests.RequestException as e:
+                if attempt == self.max_retries or not self.is_transient(e):
+                    raise
+                print(f"[EvidenceUploader] Upload of {filename} interrupted ({e}), retrying...")
+                time.sleep(2 ** attempt)
+
+    @staticmethod
+    def is_transient(error):
+        """
+        Whether a failed request is worth retrying.
+        409 (offset mismatch) and 404 (session lost to an API restart) are
+        resolved by re-syncing the offset; other 4xx errors are permanent.
+        """
+        if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+            return True
+        if isinstance(error, requests.HTTPError) and error.response is not None:
+            status = error.response.status_code
+            return status in (404, 409) or status >= 500
+        return False
+
+    def _upload_from_offset(self, path, filename, size, sha256):
+        # Ask the API where to continue from (0 for a new upload)
+        response = requests.post(f"{self.base_url}/uploads", json={
+            "filename": filename,
+            "size": size,
+            "sha256": sha256
+        }, timeout=UPLOAD_TIMEOUT)
+        response.raise_for_status()
+        state = response.json()
+
+        if state["complete"]:
+            return state["evidence_path"]
+
+        offset = state["offset"]
+        with open(path, "rb") as f:
+            f.seek(offset)
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    break
+
+                response = requests.put(
+                    f"{self.base_url}/uploads/{sha256}",
+                    data={"offset": offset},
+                    files={"chunk": (filename, chunk, "application/octet-stream")},
+                    timeout=UPLOAD_TIMEOUT
+                )
+                response.raise_for_status()
+                state = response.json()
+
+                if state["complete"]:
+                    return state["evidence_path"]
+                offset = state["offset"]
+
+        raise requests.RequestException(f"API did not confirm upload of {filename}")